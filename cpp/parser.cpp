@@ -8,13 +8,25 @@
 #include <stdexcept>
 #include <vector>
 #include <set>
+#include <thread>
+#include <exception>
+#include <utility>
 #include <charconv> // C++17用于快速转换数字
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <pybind11/numpy.h>
 
 namespace py = pybind11;
 
+// 文件小于该大小时串行解析，避免线程启动开销
+constexpr size_t PARALLEL_MIN_BYTES = 1 << 20;
+
 // ==========================================
 // 1. 数据结构
 // ==========================================
@@ -44,14 +56,84 @@ std::string read_file_to_string(const std::string& path) {
     return {};
 }
 
+// 只读文件视图：POSIX 下用 mmap 直接映射文件，避免整份拷贝到堆上；
+// 其他平台退回 read_file_to_string
+class FileView {
+public:
+    explicit FileView(const std::string& path) {
+#ifndef _WIN32
+        int fd = ::open(path.c_str(), O_RDONLY);
+        if (fd < 0) throw std::runtime_error("无法打开文件: " + path);
+
+        struct stat st;
+        if (::fstat(fd, &st) != 0) {
+            ::close(fd);
+            throw std::runtime_error("无法读取文件信息: " + path);
+        }
+
+        size_ = static_cast<size_t>(st.st_size);
+        if (size_ > 0) {
+            void* addr = ::mmap(nullptr, size_, PROT_READ, MAP_PRIVATE, fd, 0);
+            if (addr == MAP_FAILED) {
+                ::close(fd);
+                throw std::runtime_error("无法映射文件: " + path);
+            }
+            data_ = static_cast<const char*>(addr);
+        }
+        ::close(fd);
+#else
+        buffer_ = read_file_to_string(path);
+        data_ = buffer_.data();
+        size_ = buffer_.size();
+#endif
+    }
+
+    ~FileView() {
+#ifndef _WIN32
+        if (data_ != nullptr) ::munmap(const_cast<char*>(data_), size_);
+#endif
+    }
+
+    FileView(const FileView&) = delete;
+    FileView& operator=(const FileView&) = delete;
+
+    std::string_view view() const { return std::string_view(data_, size_); }
+
+private:
+    const char* data_ = nullptr;
+    size_t size_ = 0;
+#ifdef _WIN32
+    std::string buffer_;
+#endif
+};
+
+// 解析一个浮点数，返回数字结束位置；解析失败时返回 first。
+// 优先使用 C++17 from_chars：不依赖 locale、不越过 last，比 strtod 快
+inline const char* parse_double(const char* first, const char* last, double& value) {
+#if defined(__cpp_lib_to_chars) && __cpp_lib_to_chars >= 201611L
+    const char* start = (first < last && *first == '+') ? first + 1 : first; // from_chars 不接受前导 '+'
+    auto result = std::from_chars(start, last, value);
+    if (result.ec == std::errc()) return result.ptr;
+    if (result.ec != std::errc::result_out_of_range) return first;
+    // 超出 double 范围时与 strtod 行为保持一致 (±HUGE_VAL 或 0)
+#endif
+    // strtod 需要以 '\0' 结尾的输入，先拷贝当前 token，避免越过映射区末尾
+    const char* token_end = first;
+    while (token_end < last && !std::isspace(static_cast<unsigned char>(*token_end))) token_end++;
+    const std::string token(first, token_end);
+    char* strtod_end;
+    value = std::strtod(token.c_str(), &strtod_end);
+    return first + (strtod_end - token.c_str());
+}
+
 // 快速解析一行 Header (去除 # 和 空格)
 std::vector<std::string> parse_header_line(const char* start, const char* end) {
     std::vector<std::string> headers;
     std::string current;
     for (const char* p = start; p < end; ++p) {
         char c = *p;
-        // 跳过注释符、引号、换行
-        if (c == '#' || c == '"' || c == '\r' || c == '\n') continue;
+        // 跳过注释符、引号（含单引号）、换行，列名在 C++ 中一次规整完毕
+        if (c == '#' || c == '"' || c == '\'' || c == '\r' || c == '\n') continue;
         
         // 遇到分隔符 (空格, Tab, 逗号)
         if (std::isspace(static_cast<unsigned char>(c)) || c == ',') {
@@ -67,7 +149,7 @@ std::vector<std::string> parse_header_line(const char* start, const char* end) {
     return headers;
 }
 
-void parse_sample_counts(const std::string& content, FFEFile& result) {
+void parse_sample_counts(std::string_view content, FFEFile& result) {
     const char* ptr = content.data();
     const char* end = content.data() + content.size();
     const char* key = "#No. of ";
@@ -75,15 +157,28 @@ void parse_sample_counts(const std::string& content, FFEFile& result) {
     const char* suffix = " Samples:";
     const size_t suffix_len = std::strlen(suffix);
 
+    // 采样点数在每个 Section 头部重复出现，只扫描文件开头到第一行数值数据之前的部分，
+    // 不逐行检查数据区（FEKO 的 "** File exported by ..." 等横幅行不算数据）
     while (ptr < end) {
         auto line_end = std::find(ptr, end, '\n');
+        auto first_char = std::find_if_not(ptr, line_end, [](char c) {
+            return std::isspace(static_cast<unsigned char>(c));
+        });
+        if (first_char != line_end) {
+            const char c = *first_char;
+            if ((c >= '0' && c <= '9') || c == '-' || c == '+' || c == '.') break;
+        }
+
         auto key_pos = std::search(ptr, line_end, key, key + key_len);
         if (key_pos != line_end) {
             const char* name_start = key_pos + key_len;
             auto suffix_pos = std::search(name_start, line_end, suffix, suffix + suffix_len);
             if (suffix_pos != line_end) {
                 std::string axis_name(name_start, suffix_pos);
-                size_t value = static_cast<size_t>(std::strtoull(suffix_pos + suffix_len, nullptr, 10));
+                const char* value_start = suffix_pos + suffix_len;
+                while (value_start < line_end && (*value_start == ' ' || *value_start == '\t')) value_start++;
+                size_t value = 0;
+                std::from_chars(value_start, line_end, value);
 
                 if (!result.headers.empty()) {
                     if (axis_name == result.headers[0]) {
@@ -102,10 +197,71 @@ void parse_sample_counts(const std::string& content, FFEFile& result) {
     }
 }
 
+// 解析单个 Section 的频率和数值，只读输入区间，可在多个线程中并行调用
+Section parse_section(const char* current_ptr, const char* section_end, size_t n_cols, size_t reserve_hint) {
+    const char* FREQ_TAG = "#Frequency:";
+    const size_t FREQ_TAG_LEN = std::strlen(FREQ_TAG);
+
+    Section current_sec;
+    current_sec.frequency = 0.0;
+    current_sec.row_count = 0;
+    current_sec.data.reserve(reserve_hint);
+
+    // --- 在当前 Section 内查找频率 ---
+    auto freq_pos = std::search(current_ptr, section_end, FREQ_TAG, FREQ_TAG + FREQ_TAG_LEN);
+    if (freq_pos != section_end) {
+        // 找到频率，跳过空白后读取数字
+        const char* val_start = freq_pos + FREQ_TAG_LEN;
+        while (val_start < section_end && (*val_start == ' ' || *val_start == '\t')) val_start++;
+        parse_double(val_start, section_end, current_sec.frequency);
+    }
+
+    // --- 解析数值 ---
+    while (current_ptr < section_end) {
+        // 跳过空白字符
+        while (current_ptr < section_end && std::isspace(static_cast<unsigned char>(*current_ptr))) {
+            current_ptr++;
+        }
+
+        if (current_ptr >= section_end) break;
+
+        // 简单过滤：如果这一行是以 '#' 开头（除了 #Frequency 上面已经处理了），整行跳过
+        // 注意：这会防止把注释里的数字读进去
+        if (*current_ptr == '#') {
+            while (current_ptr < section_end && *current_ptr != '\n') current_ptr++;
+            continue;
+        }
+
+        // 尝试解析数字
+        char c = *current_ptr;
+        // 判断是否是数字字符 (包括负号和小数点)
+        if ((c >= '0' && c <= '9') || c == '-' || c == '+' || c == '.') {
+            double val = 0.0;
+            const char* num_end = parse_double(current_ptr, section_end, val);
+
+            if (current_ptr == num_end) {
+                current_ptr++; // 解析失败，强制步进
+            } else {
+                current_sec.data.push_back(val);
+                current_ptr = num_end;
+            }
+        } else {
+            current_ptr++;
+        }
+    }
+
+    // 计算行数 (总数据量 / 列数)
+    if (n_cols != 0) {
+        current_sec.row_count = current_sec.data.size() / n_cols;
+    }
+
+    return current_sec;
+}
+
 // ==========================================
 // 3. 核心解析函数 (包含 Header 和 Frequency)
 // ==========================================
-FFEFile parse_content(const std::string& content) {
+FFEFile parse_content(std::string_view content) {
     FFEFile result;
     const char* ptr = content.data();  // 初始指针
     const char* end = content.data() + content.size();
@@ -134,95 +290,74 @@ FFEFile parse_content(const std::string& content) {
 
     parse_sample_counts(content, result);
 
-    // --- B. 解析 Sections ---
-    // 根据您的 Python 代码，Section 由 #Configuration Name 分隔
-    const char* SECTION_TAG = "#Configuration Name";
-    const size_t TAG_LEN = std::strlen(SECTION_TAG);
-    const char* FREQ_TAG = "#Frequency:";
-    const size_t FREQ_TAG_LEN = std::strlen(FREQ_TAG);
+    // --- B. 定位所有 Section ---
+    // Section 由 #Configuration Name 分隔，各 Section 之间互不依赖
+    // string_view::find 先用 memchr 定位 '#'，数据区内没有 '#'，可整段跳过
+    constexpr std::string_view SECTION_TAG = "#Configuration Name";
+    std::vector<std::pair<const char*, const char*>> ranges;
 
-    while (ptr < end) {
-        // 1. 查找下一个 Section
-        auto section_start = std::search(ptr, end, SECTION_TAG, SECTION_TAG + TAG_LEN);
-        if (section_start == end) break;
+    size_t section_start = content.find(SECTION_TAG);
+    while (section_start != std::string_view::npos) {
+        // 找到 Section 后，直接跳到这一行的末尾换行符处
+        size_t body_start = content.find('\n', section_start);
+        if (body_start == std::string_view::npos) body_start = content.size();
 
-        // 移动指针，开始处理这个 Section
-        // ptr = section_start + TAG_LEN;
+        // 这个 Section 的结束位置（下一个 Section 的开始，或者文件末尾）
+        size_t next_section = content.find(SECTION_TAG, body_start);
+        ranges.emplace_back(ptr + body_start, next_section == std::string_view::npos ? end : ptr + next_section);
+        section_start = next_section;
+    }
 
-        // 找到 Section 后，直接跳到这一行的末尾换行符处
-        ptr = section_start;
-        while (ptr < end && *ptr != '\n') ptr++;
-        
-        // 确定这个 Section 的结束位置（下一个 Section 的开始，或者文件末尾）
-        auto next_section = std::search(ptr, end, SECTION_TAG, SECTION_TAG + TAG_LEN);
-        
-        // 这一段数据的范围
-        const char* current_ptr = ptr;
-        const char* section_end = next_section;
-
-        Section current_sec;
-        current_sec.frequency = 0.0;
-        current_sec.data.reserve(2000); // 预分配内存，假设大概有几千个数
-
-        // --- C. 在当前 Section 内查找频率 ---
-        auto freq_pos = std::search(current_ptr, section_end, FREQ_TAG, FREQ_TAG + FREQ_TAG_LEN);
-        if (freq_pos != section_end) {
-            // 找到频率，读取后面的数字
-            char* val_end;
-            current_sec.frequency = std::strtod(freq_pos + FREQ_TAG_LEN, &val_end);
-        }
+    // --- C. 解析各 Section（大文件多线程并行）---
+    const size_t n_cols = result.headers.size();
+    const size_t n_sections = ranges.size();
+    result.sections.resize(n_sections);
+
+    // 预分配内存：优先按采样点数估算；没有采样点数时先串行解析第一个 Section，
+    // 用它的大小作为其余 Section 的预分配大小
+    size_t reserve_hint = 2000;
+    size_t first_parallel = 0;
+    if (result.axis1_samples != 0 && result.axis2_samples != 0 && n_cols != 0) {
+        reserve_hint = result.axis1_samples * result.axis2_samples * n_cols;
+    } else if (n_sections > 0) {
+        result.sections[0] = parse_section(ranges[0].first, ranges[0].second, n_cols, reserve_hint);
+        reserve_hint = std::max<size_t>(result.sections[0].data.size(), 1);
+        first_parallel = 1;
+    }
 
-        // --- D. 解析数值 ---
-        while (current_ptr < section_end) {
-            // 跳过空白字符
-            while (current_ptr < section_end && std::isspace(static_cast<unsigned char>(*current_ptr))) {
-                current_ptr++;
-            }
-            
-            // 简单过滤：如果这一行是以 '#' 开头（除了 #Frequency 上面已经处理了），整行跳过
-            // 注意：这会防止把注释里的数字读进去
-            if (*current_ptr == '#') {
-                while (current_ptr < section_end && *current_ptr != '\n') current_ptr++;
-                continue;
-            }
+    const size_t n_remaining = n_sections - first_parallel;
+    size_t n_workers = 1;
+    if (n_remaining > 1 && content.size() >= PARALLEL_MIN_BYTES) {
+        n_workers = std::min<size_t>(n_remaining, std::max(1u, std::thread::hardware_concurrency()));
+    }
 
-            if (current_ptr >= section_end) break;
-
-            // 尝试解析数字
-            char c = *current_ptr;
-            // 判断是否是数字字符 (包括负号和小数点)
-            if ((c >= '0' && c <= '9') || c == '-' || c == '+' || c == '.') {
-                char* num_end;
-                double val = std::strtod(current_ptr, &num_end);
-                
-                if (current_ptr == num_end) {
-                    current_ptr++; // 解析失败，强制步进
-                } else {
-                    current_sec.data.push_back(val);
-                    current_ptr = num_end;
-                }
-            } else {
-                current_ptr++;
+    std::vector<std::exception_ptr> errors(n_workers);
+    auto worker = [&](size_t w) {
+        try {
+            for (size_t i = first_parallel + w; i < n_sections; i += n_workers) {
+                result.sections[i] = parse_section(ranges[i].first, ranges[i].second, n_cols, reserve_hint);
             }
+        } catch (...) {
+            errors[w] = std::current_exception();
         }
+    };
 
-        // 计算行数 (总数据量 / 列数)
-        if (!result.headers.empty()) {
-            current_sec.row_count = current_sec.data.size() / result.headers.size();
-        }
+    std::vector<std::thread> threads;
+    threads.reserve(n_workers - 1);
+    for (size_t w = 1; w < n_workers; ++w) threads.emplace_back(worker, w);
+    worker(0);
+    for (auto& t : threads) t.join();
 
-        result.sections.push_back(std::move(current_sec));
-        
-        // 准备下一轮循环
-        ptr = next_section;
+    for (const auto& error : errors) {
+        if (error) std::rethrow_exception(error);
     }
 
     return result;
 }
 
 FFEFile parse_ffe(const std::string path){
-    std::string content = read_file_to_string(path);
-    FFEFile file_data = parse_content(content);
+    FileView file(path);
+    FFEFile file_data = parse_content(file.view());
     return file_data;
 }
 
@@ -243,7 +378,12 @@ py::array_t<double> section_data_array(const Section& section) {
 }
 
 py::tuple parse_ffe_array(const std::string path) {
-    FFEFile file_data = parse_ffe(path);
+    FFEFile file_data;
+    {
+        // 纯 C++ 解析阶段释放 GIL，允许其他 Python 线程并发解析
+        py::gil_scoped_release release;
+        file_data = parse_ffe(path);
+    }
 
     if (file_data.headers.empty()) {
         throw std::runtime_error("FFE header was not found.");
@@ -271,7 +411,8 @@ py::tuple parse_ffe_array(const std::string path) {
     py::array_t<double> data(data_shape);
 
     auto freqs_view = freqs.mutable_unchecked<1>();
-    auto data_view = data.mutable_unchecked<3>();
+    double* data_ptr = data.mutable_data();
+    const size_t block_size = n_rows * n_cols;
 
     for (size_t i = 0; i < n_freq; ++i) {
         const Section& section = file_data.sections[i];
@@ -283,12 +424,8 @@ py::tuple parse_ffe_array(const std::string path) {
         }
 
         freqs_view(i) = section.frequency;
-        const double* src = section.data.data();
-        for (size_t r = 0; r < n_rows; ++r) {
-            for (size_t c = 0; c < n_cols; ++c) {
-                data_view(i, r, c) = src[r * n_cols + c];
-            }
-        }
+        // Section 数据已是 (Rows, Cols) 行主序，整块拷贝
+        std::memcpy(data_ptr + i * block_size, section.data.data(), block_size * sizeof(double));
     }
 
     return py::make_tuple(file_data.headers, freqs, data);
@@ -347,7 +484,11 @@ bool validate_axis1_inner(
 }
 
 py::tuple parse_ffe_grid(const std::string path) {
-    FFEFile file_data = parse_ffe(path);
+    FFEFile file_data;
+    {
+        py::gil_scoped_release release;
+        file_data = parse_ffe(path);
+    }
 
     if (file_data.headers.size() < 2) {
         throw std::runtime_error("FFE header must contain at least two coordinate columns.");
@@ -410,7 +551,8 @@ py::tuple parse_ffe_grid(const std::string path) {
     std::memcpy(axis2_array.mutable_data(), axis2.data(), axis2.size() * sizeof(double));
 
     auto freqs_view = freqs.mutable_unchecked<1>();
-    auto data_view = data.mutable_unchecked<4>();
+    double* data_ptr = data.mutable_data();
+    const size_t block_size = n_rows * n_cols;
 
     for (size_t f = 0; f < n_freq; ++f) {
         const Section& section = file_data.sections[f];
@@ -419,12 +561,21 @@ py::tuple parse_ffe_grid(const std::string path) {
         }
 
         freqs_view(f) = section.frequency;
+        double* dst = data_ptr + f * block_size;
+        if (axis2_inner) {
+            // 行顺序与 (Axis1, Axis2, Column) 一致，整块拷贝
+            std::memcpy(dst, section.data.data(), block_size * sizeof(double));
+            continue;
+        }
+
         for (size_t i = 0; i < n_axis1; ++i) {
             for (size_t j = 0; j < n_axis2; ++j) {
-                const size_t row = axis2_inner ? i * n_axis2 + j : j * n_axis1 + i;
-                for (size_t c = 0; c < n_cols; ++c) {
-                    data_view(f, i, j, c) = section.data[row * n_cols + c];
-                }
+                const size_t row = j * n_axis1 + i;
+                std::memcpy(
+                    dst + (i * n_axis2 + j) * n_cols,
+                    section.data.data() + row * n_cols,
+                    n_cols * sizeof(double)
+                );
             }
         }
     }
@@ -449,7 +600,7 @@ PYBIND11_MODULE(_parser, m) {
         .def_readwrite("headers", &FFEFile::headers)   
         .def_readwrite("sections", &FFEFile::sections);
 
-    m.def("parse_ffe", &parse_ffe, "Parse FFE file");
+    m.def("parse_ffe", &parse_ffe, "Parse FFE file", py::call_guard<py::gil_scoped_release>());
     m.def("parse_ffe_array", &parse_ffe_array, "Parse FFE file and return headers, frequencies, and a 3D NumPy array");
     m.def("parse_ffe_grid", &parse_ffe_grid, "Parse FFE file and return grid-shaped arrays for xarray construction");
 }
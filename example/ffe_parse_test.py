@@ -26,5 +26,5 @@ if __name__ == '__main__':
     phis = np.linspace(0, 360, 10)
     
     # 取出特定频率、特定空域、特定分量的电场的虚部
-    ff = ffd.electric_field.sel(Frequency=2e5, Theta=thetas, Phi=phis)['Etheta'].values.imag
+    ff = ffd.sel_fast(2e5, thetas, phis, field='Etheta').imag
     print(ff)
@@ -1,3 +1,5 @@
+import sys
+
 from setuptools import find_packages, setup
 from pybind11.setup_helpers import Pybind11Extension
 
@@ -6,6 +8,7 @@ ext_modules = [
         "ffe._parser",
         ["cpp/parser.cpp"],
         cxx_std=17,
+        extra_link_args=[] if sys.platform == "win32" else ["-pthread"],
     ),
 ]
 
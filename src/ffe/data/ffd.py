@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from os import PathLike
 from typing import Iterable, Union
 
 import numpy as np
+import numpy.typing as npt
 import xarray as xr
 
 PathInput = Union[str, PathLike[str]]
@@ -14,20 +15,49 @@ PathInput = Union[str, PathLike[str]]
 class FFData:
     """远场数据类"""
     ds: xr.Dataset
+    dtype: npt.DTypeLike = np.complex128
+    _efield: xr.Dataset | None = field(default=None, init=False, repr=False, compare=False)
+    _cartesian: np.ndarray | None = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         if not isinstance(self.ds, xr.Dataset):
             raise TypeError(f"FFData 只接受 xarray.Dataset，当前类型为: {type(self.ds).__name__}")
 
+        self.dtype = np.dtype(self.dtype)
+        if self.dtype.kind != "c":
+            raise TypeError(f"dtype 必须为复数类型（如 np.complex64），当前为: {self.dtype}")
+
     @classmethod
-    def from_path(cls, path: PathInput | Iterable[PathInput]) -> FFData:
-        """从一个或多个 FFE 路径读取数据并构造 FFData。"""
+    def from_path(
+        cls,
+        path: PathInput | Iterable[PathInput],
+        dtype: npt.DTypeLike = np.complex128,
+        chunks: int | None = None,
+        cache_dir: PathInput | None = None,
+    ) -> FFData:
+        """
+        从一个或多个 FFE 路径读取数据并构造 FFData。
+
+        `chunks` 不为 None 时按 Frequency 维分块为 Dask 数组（需安装 dask），
+        后续计算按块惰性进行。
+        `cache_dir` 不为 None 时将解析结果缓存为二进制文件，再次运行时直接加载。
+        """
         from ..parser import parse_ffe_dataset, parse_ffe_datasets
 
         if isinstance(path, (str, PathLike)):
-            return cls(parse_ffe_dataset(path))
+            ds = parse_ffe_dataset(path, cache_dir=cache_dir)
+        else:
+            ds = parse_ffe_datasets(path, cache_dir=cache_dir)
+
+        if chunks is not None:
+            ds = ds.chunk({"Frequency": chunks})
+
+        return cls(ds, dtype=dtype)
 
-        return cls(parse_ffe_datasets(path))
+    @property
+    def _real_dtype(self) -> np.dtype:
+        """与复数精度对应的实数类型。"""
+        return np.finfo(self.dtype).dtype
 
     @property
     def frequencies(self) -> np.ndarray:
@@ -49,9 +79,18 @@ class FFData:
         return self.ds.Phi.values
     
     @property
-    def values(self) -> np.ndarray:
-        """返回场分量值"""
-        return self.ds.to_array().values
+    def values(self) -> xr.DataArray:
+        """返回场分量值（按 `variable` 维堆叠的 DataArray，不立即物化）"""
+        return self.ds.to_array()
+
+    def to_numpy(self) -> np.ndarray:
+        """将全部场分量堆叠为 NumPy 数组"""
+        return self.values.values
+
+    @property
+    def nbytes(self) -> int:
+        """数据变量占用的字节数，无需物化数组"""
+        return sum(variable.nbytes for variable in self.ds.data_vars.values())
     
     def __getitem__(self, key: str) -> xr.DataArray:
         """
@@ -68,15 +107,27 @@ class FFData:
         
         return self.ds[key]
 
+    def _complex_component(self, name: str) -> xr.DataArray:
+        """将 Re/Im 两列直接填入复数缓冲区，避免 `1j * Im` 临时数组。"""
+        real = self.ds[f"Re({name})"]
+        # 按维度名对齐，Re/Im 的维度顺序可能不同
+        imag = self.ds[f"Im({name})"].transpose(*real.dims)
+        if real.chunks is not None:
+            # Dask 数组保持惰性，按块组装
+            values = (real.data + 1j * imag.data).astype(self.dtype)
+            return xr.DataArray(values, coords=real.coords, dims=real.dims, name=name)
+
+        values = np.empty(real.shape, dtype=self.dtype)
+        values.real = real.values
+        values.imag = imag.values
+        # 结果会被缓存并在多次访问间共享，设为只读防止调用方原地修改
+        values.flags.writeable = False
+        return xr.DataArray(values, coords=real.coords, dims=real.dims, name=name)
+
     def _electric_field_components(self) -> tuple[xr.DataArray, xr.DataArray]:
         """提取复数球坐标电场分量。"""
-        try:
-            etheta = self.ds["Re(Etheta)"] + 1j * self.ds["Im(Etheta)"]
-            ephi = self.ds["Re(Ephi)"] + 1j * self.ds["Im(Ephi)"]
-        except KeyError:
-            raise ValueError("文件解析错误! 找不到标准的电场分量列(Re(Etheta)等)")
-
-        return etheta, ephi
+        efield = self.electric_field
+        return efield["Etheta"], efield["Ephi"]
 
     def ff(self, theta: float, phi: float, coord: str = "sph") -> np.ndarray:
         """
@@ -118,21 +169,120 @@ class FFData:
 
     @property
     def exyz(self) -> np.ndarray:
-        """返回所有笛卡尔坐标系电场分量。"""
+        """返回所有笛卡尔坐标系电场分量（缓存的只读数组）。"""
         return self._spherical_to_cartesian()
 
     @property
     def electric_field(self) -> xr.Dataset:
-        """提取复数电场分量，保留 xarray 形式。"""
-        etheta, ephi = self._electric_field_components()
-        return xr.Dataset({"Etheta": etheta, "Ephi": ephi})
+        """提取复数电场分量，保留 xarray 形式。首次访问后缓存。"""
+        if self._efield is None:
+            try:
+                etheta = self._complex_component("Etheta")
+                ephi = self._complex_component("Ephi")
+            except KeyError:
+                raise ValueError("文件解析错误! 找不到标准的电场分量列(Re(Etheta)等)")
 
-    def to_cartesian(self) -> xr.Dataset:
-        """球坐标转直角坐标，返回 xarray Dataset。"""
-        etheta, ephi = self._electric_field_components()
+            self._efield = xr.Dataset({"Etheta": etheta, "Ephi": ephi})
+
+        return self._efield
+
+    def _angle_factor(self, values: np.ndarray, ndim: int, axis: int) -> np.ndarray:
+        """将一维角度因子转为可沿 `axis` 广播的数组。"""
+        shape = [1] * ndim
+        shape[axis] = -1
+        return values.astype(self._real_dtype).reshape(shape)
+
+    def _cartesian_values(self, etheta: xr.DataArray, ephi: xr.DataArray) -> np.ndarray:
+        """
+        单次遍历计算 `[Ex, Ey, Ez]`，结果写入一个预分配的 `(3, ...)` 缓冲区。
+
+        三角函数只在一维坐标上求值，广播乘法通过 `out=` 复用缓冲区，
+        不再为每个 xarray 表达式生成完整大小的中间数组。
+        """
+        eth = etheta.values
+        # 角度因子按 etheta 的轴号广播，ephi 需按维度名对齐到同一顺序
+        eph = ephi.transpose(*etheta.dims).values
+        t_axis = etheta.get_axis_num("Theta")
+        p_axis = etheta.get_axis_num("Phi")
 
-        theta = np.deg2rad(self.ds.Theta)
-        phi = np.deg2rad(self.ds.Phi)
+        theta = np.deg2rad(etheta.Theta.values)
+        phi = np.deg2rad(etheta.Phi.values)
+        ct = self._angle_factor(np.cos(theta), eth.ndim, t_axis)
+        st = self._angle_factor(np.sin(theta), eth.ndim, t_axis)
+        cp = self._angle_factor(np.cos(phi), eth.ndim, p_axis)
+        sp = self._angle_factor(np.sin(phi), eth.ndim, p_axis)
+
+        result = np.empty((3, *eth.shape), dtype=np.result_type(eth, eph))
+        ex, ey, ez = result
+        scratch = np.empty_like(ex)
+
+        np.multiply(eth, ct * cp, out=ex)
+        np.multiply(eph, sp, out=scratch)
+        np.subtract(ex, scratch, out=ex)
+
+        np.multiply(eth, ct * sp, out=ey)
+        np.multiply(eph, cp, out=scratch)
+        np.add(ey, scratch, out=ey)
+
+        np.multiply(eth, -st, out=ez)
+        return result
+
+    @staticmethod
+    def _label_positions(coord: np.ndarray, labels: npt.ArrayLike, dim: str) -> np.ndarray:
+        """用二分查找把坐标标签转换为整数下标，坐标非升序时借助排序索引。"""
+        labels = np.atleast_1d(np.asarray(labels, dtype=coord.dtype))
+        sorter = None if np.all(coord[:-1] <= coord[1:]) else np.argsort(coord, kind="stable")
+        positions = np.searchsorted(coord, labels, sorter=sorter).clip(0, len(coord) - 1)
+        if sorter is not None:
+            positions = sorter[positions]
+
+        missing = labels[coord[positions] != labels]
+        if missing.size:
+            raise KeyError(f"{dim} 坐标中不存在: {missing.tolist()}")
+        return positions
+
+    def sel_fast(
+        self,
+        frequency: npt.ArrayLike,
+        theta: npt.ArrayLike,
+        phi: npt.ArrayLike,
+        field: str = "Etheta",
+    ) -> np.ndarray:
+        """
+        按坐标值快速取出复数电场分量，等价于
+        `electric_field.sel(Frequency=..., Theta=..., Phi=...)[field].values`。
+
+        用 searchsorted 定位下标后只 gather 所需点的 Re/Im，跳过 xarray 的标签索引，
+        也不构造完整的复数场；Dask 分块数据只计算取出的部分。
+        与 `.sel` 一样，标量参数对应的维度会被去掉。
+        """
+        dims = ("Frequency", "Theta", "Phi")
+        real = self.ds[f"Re({field})"].transpose(*dims)
+        imag = self.ds[f"Im({field})"].transpose(*dims)
+        labels = (frequency, theta, phi)
+        indices = [
+            self._label_positions(real[dim].values, label, dim)
+            for dim, label in zip(dims, labels)
+        ]
+
+        def gather(data):
+            if isinstance(data, np.ndarray):
+                return data[np.ix_(*indices)]
+            # Dask 数组逐轴取下标，只计算被选中的块
+            for axis, index in enumerate(indices):
+                data = data[(slice(None),) * axis + (index,)]
+            return np.asarray(data)
+
+        gathered_real = gather(real.data)
+        result = np.empty(gathered_real.shape, dtype=self.dtype)
+        result.real = gathered_real
+        result.imag = gather(imag.data)
+        return result[tuple(0 if np.ndim(label) == 0 else slice(None) for label in labels)]
+
+    def _lazy_cartesian(self, etheta: xr.DataArray, ephi: xr.DataArray) -> xr.Dataset:
+        """Dask 分块数据使用 xarray 表达式转换，保持惰性、不缓存。"""
+        theta = np.deg2rad(etheta.Theta).astype(self._real_dtype)
+        phi = np.deg2rad(etheta.Phi).astype(self._real_dtype)
 
         ex = etheta * np.cos(theta) * np.cos(phi) - ephi * np.sin(phi)
         ey = etheta * np.cos(theta) * np.sin(phi) + ephi * np.cos(phi)
@@ -140,10 +290,31 @@ class FFData:
 
         return xr.Dataset({"Ex": ex, "Ey": ey, "Ez": ez})
 
-    def _spherical_to_cartesian(self) -> np.ndarray:
-        """将所有球坐标电场分量转换为笛卡尔坐标。"""
-        cartesian = self.to_cartesian()
-        return np.stack(
-            [cartesian["Ex"].values, cartesian["Ey"].values, cartesian["Ez"].values],
-            axis=0,
+    def to_cartesian(self) -> xr.Dataset:
+        """球坐标转直角坐标，返回 xarray Dataset。"""
+        etheta, ephi = self._electric_field_components()
+        if etheta.chunks is not None:
+            return self._lazy_cartesian(etheta, ephi)
+
+        ex, ey, ez = self._spherical_to_cartesian()
+
+        return xr.Dataset(
+            {
+                name: xr.DataArray(values, coords=etheta.coords, dims=etheta.dims, name=name)
+                for name, values in (("Ex", ex), ("Ey", ey), ("Ez", ez))
+            }
         )
+
+    def _spherical_to_cartesian(self) -> np.ndarray:
+        """将所有球坐标电场分量转换为笛卡尔坐标。首次计算后缓存（Dask 分块数据不缓存）。"""
+        if self._cartesian is None:
+            etheta, ephi = self._electric_field_components()
+            if etheta.chunks is not None:
+                cartesian = self._lazy_cartesian(etheta, ephi)
+                return np.stack([cartesian[name].values for name in ("Ex", "Ey", "Ez")], axis=0)
+
+            cartesian = self._cartesian_values(etheta, ephi)
+            cartesian.flags.writeable = False
+            self._cartesian = cartesian
+
+        return self._cartesian
@@ -1,38 +1,105 @@
+import hashlib
+import os
+import tempfile
+import zipfile
 from functools import lru_cache
 from os import PathLike
+from pathlib import Path
 from typing import Iterable, Union
 
+import numpy as np
+import numpy.typing as npt
+
 from . import _parser  # type: ignore
 from .data import FFData
 from .utils import FFEToXarray, combine_ffe_datasets
 
 PathInput = Union[str, PathLike[str]]
+FileKey = tuple[str, int, int]
 
 
 def _as_path_str(path: PathInput) -> str:
     return str(path)
 
 
-@lru_cache(maxsize=1024)
-def _parse_ffe_raw(path: str):
-    return _parser.parse_ffe(path)
+def _file_key(path: PathInput) -> FileKey:
+    """Cache key for a parsed file: path plus modification time and size.
+
+    Editing the file on disk changes the key, so cached results never go stale.
+    """
+    path_str = _as_path_str(path)
+    stat = os.stat(path_str)
+    return path_str, stat.st_mtime_ns, stat.st_size
+
+
+@lru_cache(maxsize=32)
+def _parse_ffe_raw(key: FileKey):
+    return _parser.parse_ffe(key[0])
 
 
-@lru_cache(maxsize=1024)
-def _parse_ffe_array(path: str):
-    headers, frequencies, data = _parser.parse_ffe_array(path)
+@lru_cache(maxsize=32)
+def _parse_ffe_array(key: FileKey):
+    headers, frequencies, data = _parser.parse_ffe_array(key[0])
     return tuple(headers), frequencies, data
 
 
-@lru_cache(maxsize=1024)
-def _parse_ffe_grid(path: str):
-    headers, frequencies, axis1, axis2, data = _parser.parse_ffe_grid(path)
+@lru_cache(maxsize=32)
+def _parse_ffe_grid(key: FileKey):
+    headers, frequencies, axis1, axis2, data = _parser.parse_ffe_grid(key[0])
     return tuple(headers), frequencies, axis1, axis2, data
 
 
+# 解析输出（列名、数据、校验规则）或缓存格式变化时递增，使旧的缓存文件失效
+_GRID_CACHE_VERSION = 1
+
+
+def _grid_cache_file(cache_dir: PathInput, key: FileKey) -> Path:
+    path_str, mtime_ns, size = key
+    digest = hashlib.sha1(
+        f"v{_GRID_CACHE_VERSION}|{os.path.abspath(path_str)}|{mtime_ns}|{size}".encode()
+    ).hexdigest()
+    return Path(cache_dir) / f"{digest}.npz"
+
+
+def _load_grid_cache(cache_file: Path):
+    try:
+        with np.load(cache_file, allow_pickle=False) as cached:
+            return (
+                tuple(cached["headers"].tolist()),
+                cached["frequencies"],
+                cached["axis1"],
+                cached["axis2"],
+                cached["data"],
+            )
+    except FileNotFoundError:
+        return None
+    except (zipfile.BadZipFile, EOFError, KeyError, ValueError):
+        # 缓存文件损坏（如写入中断），删除后按未命中处理，下次重新写入
+        cache_file.unlink(missing_ok=True)
+        return None
+    except OSError:
+        return None
+
+
+def _save_grid_cache(cache_file: Path, grid) -> None:
+    headers, frequencies, axis1, axis2, data = grid
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    # 先写唯一命名的临时文件再原子替换，避免并发的进程或线程读到半个文件
+    with tempfile.NamedTemporaryFile(dir=cache_file.parent, suffix=".tmp.npz", delete=False) as tmp:
+        tmp_file = Path(tmp.name)
+        try:
+            np.savez(tmp, headers=np.array(headers), frequencies=frequencies, axis1=axis1, axis2=axis2, data=data)
+        except BaseException:
+            tmp.close()
+            tmp_file.unlink(missing_ok=True)
+            raise
+
+    os.replace(tmp_file, cache_file)
+
+
 def parse_ffe(path: PathInput):
     """Parse an FFE file and return the low-level C++ FFEFile object."""
-    return _parse_ffe_raw(_as_path_str(path))
+    return _parse_ffe_raw(_file_key(path))
 
 
 def parse_ffe_array(path: PathInput):
@@ -41,32 +108,62 @@ def parse_ffe_array(path: PathInput):
     ``data`` has shape ``(Frequency, SpatialPoint, Column)`` and crosses the
     C++/Python boundary once, which is faster than collecting each section.
     """
-    return _parse_ffe_array(_as_path_str(path))
+    return _parse_ffe_array(_file_key(path))
 
 
-def parse_ffe_grid(path: PathInput):
+def parse_ffe_grid(path: PathInput, cache_dir: PathInput | None = None):
     """Parse an FFE file into grid-shaped arrays.
 
     ``data`` has shape ``(Frequency, Axis1, Axis2, Column)`` and is ready for
     direct xarray construction.
-    """
-    return _parse_ffe_grid(_as_path_str(path))
-
 
-def parse_ffe_dataset(path: PathInput):
+    When ``cache_dir`` is given, the parsed arrays are also stored there as a
+    binary ``.npz`` keyed by path, modification time, and size, so later runs
+    load them instead of re-parsing the text file.
+    """
+    key = _file_key(path)
+    if cache_dir is None:
+        return _parse_ffe_grid(key)
+
+    cache_file = _grid_cache_file(cache_dir, key)
+    grid = _load_grid_cache(cache_file)
+    if grid is None:
+        grid = _parse_ffe_grid(key)
+        try:
+            _save_grid_cache(cache_file, grid)
+        except OSError:
+            # 缓存目录不可写等情况只影响缓存，不影响解析结果
+            pass
+    return grid
+
+
+def parse_ffe_dataset(path: PathInput, cache_dir: PathInput | None = None):
     """Parse an FFE file and return an xarray Dataset."""
-    return FFEToXarray.from_file(path).convert()
+    return FFEToXarray.from_file(path, cache_dir=cache_dir).convert()
 
 
-def parse_ffe_datasets(paths: Iterable[PathInput]):
+def parse_ffe_datasets(paths: Iterable[PathInput], cache_dir: PathInput | None = None):
     """Parse multiple FFE files and concatenate them along Frequency.
 
     Non-frequency dimensions, coordinates, and data variables must match. The
-    resulting Frequency order follows the input path order.
+    resulting Frequency order follows the input path order. A frequency that
+    already appeared in an earlier file is dropped from later files; repeats
+    within a single file are kept as-is, matching single-file parsing.
     """
-    return combine_ffe_datasets(parse_ffe_dataset(path) for path in paths)
+    return combine_ffe_datasets(parse_ffe_dataset(path, cache_dir=cache_dir) for path in paths)
+
 
+def parse(
+    path: PathInput | Iterable[PathInput],
+    dtype: npt.DTypeLike = np.complex128,
+    chunks: int | None = None,
+    cache_dir: PathInput | None = None,
+) -> FFData:
+    """Parse one or more FFE files and return the high-level FFData wrapper.
 
-def parse(path: PathInput | Iterable[PathInput]) -> FFData:
-    """Parse one or more FFE files and return the high-level FFData wrapper."""
-    return FFData.from_path(path)
+    ``dtype`` sets the complex precision of the derived electric field; use
+    ``np.complex64`` to halve its memory footprint. ``chunks`` splits the
+    dataset into Dask chunks of that many frequencies (requires ``dask``).
+    ``cache_dir`` enables the on-disk parse cache of :func:`parse_ffe_grid`.
+    """
+    return FFData.from_path(path, dtype=dtype, chunks=chunks, cache_dir=cache_dir)
@@ -25,7 +25,40 @@ def combine_ffe_datasets(datasets):
         if dataset_non_frequency_dims != non_frequency_dims:
             raise ValueError(f"Dataset at position {idx} has incompatible non-frequency dimensions.")
 
-    return xr.concat(datasets, dim="Frequency", data_vars="all", coords="minimal", compat="equals")
+    if len(datasets) == 1:
+        return reference
+
+    # 相邻频段可能在边界处重叠：只去除跨文件的重复频点，保留最先出现的文件中的数据；
+    # 同一文件内部的频点原样保留，与单文件解析结果一致
+    seen = set()
+    selections = []
+    for dataset in datasets:
+        freqs = dataset.Frequency.values.tolist()
+        keep = [i for i, freq in enumerate(freqs) if freq not in seen]
+        seen.update(freqs)
+        selections.append(None if len(keep) == len(freqs) else keep)
+
+    def take(values, axis, keep):
+        return values if keep is None else np.take(values, keep, axis=axis)
+
+    # 直接拼接底层数组并一次性构造 Dataset，避免 xr.concat 的对齐与中间副本
+    data_vars = {}
+    for name, variable in reference.data_vars.items():
+        axis = variable.get_axis_num("Frequency")
+        data_vars[name] = (
+            variable.dims,
+            np.concatenate(
+                [take(dataset[name].values, axis, keep) for dataset, keep in zip(datasets, selections)],
+                axis=axis,
+            ),
+        )
+
+    coords = {name: coord.variable for name, coord in reference.coords.items() if name != "Frequency"}
+    coords["Frequency"] = np.concatenate(
+        [take(dataset.Frequency.values, 0, keep) for dataset, keep in zip(datasets, selections)]
+    )
+
+    return xr.Dataset(data_vars=data_vars, coords=coords, attrs=reference.attrs)
 
 
 class FFEToXarray:
@@ -70,10 +103,10 @@ class FFEToXarray:
             raise ValueError("FFE header count does not match data column count.")
 
     @classmethod
-    def from_file(cls, path):
+    def from_file(cls, path, cache_dir=None):
         from ..parser import parse_ffe_grid
 
-        headers, frequencies, axis1, axis2, data = parse_ffe_grid(path)
+        headers, frequencies, axis1, axis2, data = parse_ffe_grid(path, cache_dir=cache_dir)
         return cls(headers=headers, frequencies=frequencies, axis1=axis1, axis2=axis2, data=data)
 
     def _coordinate_indices(self):
@@ -87,6 +120,38 @@ class FFEToXarray:
                 return lower_headers.index("u"), lower_headers.index("v")
             return 0, 1
 
+    def _detect_grid_stride(self, theta_col, phi_col):
+        """
+        按 FEKO 的网格输出顺序，从前两行判断内层循环轴，直接切片得到坐标。
+        返回 (thetas, phis, phi_inner)；不是按行有序的规则网格，或坐标不是严格升序
+        （需与 C++ parse_ffe_grid 的排序结果一致）时返回 None。
+        """
+        n = len(theta_col)
+        phi_inner = n < 2 or theta_col[0] == theta_col[1]
+        outer, inner = (theta_col, phi_col) if phi_inner else (phi_col, theta_col)
+
+        # 外层坐标第一次变化的位置即内层循环长度
+        n_inner = int(np.argmax(outer != outer[0])) or n
+        if n % n_inner:
+            return None
+
+        outer_values = outer[::n_inner]
+        inner_values = inner[:n_inner]
+        if np.any(np.diff(outer_values) <= 0) or np.any(np.diff(inner_values) <= 0):
+            return None
+
+        outer_grid = outer.reshape(-1, n_inner)
+        inner_grid = inner.reshape(-1, n_inner)
+        if not (
+            np.array_equal(outer_grid, np.broadcast_to(outer_values[:, None], outer_grid.shape))
+            and np.array_equal(inner_grid, np.broadcast_to(inner_values[None, :], inner_grid.shape))
+        ):
+            return None
+
+        if phi_inner:
+            return outer_values, inner_values, True
+        return inner_values, outer_values, False
+
     def _get_spatial_coords(self, data_sample):
         """
         从第一帧数据中解析 Theta 和 Phi 的网格结构。
@@ -98,40 +163,30 @@ class FFEToXarray:
         theta_col = data_sample[:, t_idx]
         phi_col = data_sample[:, p_idx]
 
+        grid = self._detect_grid_stride(theta_col, phi_col)
+        if grid is not None:
+            thetas, phis, phi_inner = grid
+            return t_idx, p_idx, thetas, phis, phi_inner
+
+        # 行顺序不规则时退回到排序去重
         thetas = np.unique(theta_col)
         phis = np.unique(phi_col)
-        
-        n_theta = len(thetas)
-        n_phi = len(phis)
 
         # 检查是否是规则网格
-        if n_theta * n_phi != self.n_spatial:
-            return None, None, None, None
+        if len(thetas) * len(phis) != self.n_spatial:
+            return None, None, None, None, None
 
-        return t_idx, p_idx, thetas, phis
+        return t_idx, p_idx, thetas, phis, None
 
-    def _reshape_to_grid(self, t_idx, p_idx, thetas, phis):
+    def _reshape_to_grid(self, t_idx, p_idx, thetas, phis, phi_inner):
         n_theta = len(thetas)
         n_phi = len(phis)
-        sample = self.data[0]
 
-        theta_outer = sample[:, t_idx].reshape(n_theta, n_phi)
-        phi_inner = sample[:, p_idx].reshape(n_theta, n_phi)
-        if (
-            np.allclose(theta_outer, thetas[:, None])
-            and np.allclose(phi_inner, phis[None, :])
-        ):
+        if phi_inner is None:
+            return self._reshape_by_coordinate_index(t_idx, p_idx, thetas, phis)
+        if phi_inner:
             return self.data.reshape(self.n_freq, n_theta, n_phi, self.n_cols)
-
-        phi_outer_theta_inner = sample[:, t_idx].reshape(n_phi, n_theta).T
-        theta_inner_phi_outer = sample[:, p_idx].reshape(n_phi, n_theta).T
-        if (
-            np.allclose(phi_outer_theta_inner, thetas[:, None])
-            and np.allclose(theta_inner_phi_outer, phis[None, :])
-        ):
-            return self.data.reshape(self.n_freq, n_phi, n_theta, self.n_cols).swapaxes(1, 2)
-
-        return self._reshape_by_coordinate_index(t_idx, p_idx, thetas, phis)
+        return self.data.reshape(self.n_freq, n_phi, n_theta, self.n_cols).swapaxes(1, 2)
 
     def _reshape_by_coordinate_index(self, t_idx, p_idx, thetas, phis):
         theta_index = {value: idx for idx, value in enumerate(thetas)}
@@ -145,48 +200,39 @@ class FFEToXarray:
 
         return result
 
+    def _build_dataset(self, grid_data, t_idx, p_idx, axis1_name, axis2_name, axis1, axis2):
+        """
+        用 (Frequency, Axis1, Axis2, Column) 网格数组一次性构造 Dataset。
+        每个数据变量都是 grid_data 最后一维的视图，不产生拷贝。
+        """
+        dims = ("Frequency", axis1_name, axis2_name)
+        data_vars = {
+            col_name: (dims, grid_data[..., i])
+            for i, col_name in enumerate(self.headers)
+            if i != t_idx and i != p_idx
+        }
+
+        return xr.Dataset(
+            data_vars=data_vars,
+            coords={
+                "Frequency": self.frequencies,
+                axis1_name: axis1,
+                axis2_name: axis2,
+            },
+            attrs={"description": "Parsed from FFE file"}
+        )
+
     def convert(self):
         if self.data.ndim == 4:
             t_idx, p_idx = self._coordinate_indices()
-            axis1_name = self.headers[t_idx]
-            axis2_name = self.headers[p_idx]
-            data_vars = {}
-            for i, col_name in enumerate(self.headers):
-                if i == t_idx or i == p_idx:
-                    continue
-
-                data_vars[col_name] = (["Frequency", axis1_name, axis2_name], self.data[:, :, :, i])
-
-            return xr.Dataset(
-                data_vars=data_vars,
-                coords={
-                    "Frequency": self.frequencies,
-                    axis1_name: self.axis1,
-                    axis2_name: self.axis2,
-                },
-                attrs={"description": "Parsed from FFE file"}
+            return self._build_dataset(
+                self.data, t_idx, p_idx, self.headers[t_idx], self.headers[p_idx], self.axis1, self.axis2
             )
 
-        t_idx, p_idx, unique_thetas, unique_phis = self._get_spatial_coords(self.data[0])
+        t_idx, p_idx, unique_thetas, unique_phis, phi_inner = self._get_spatial_coords(self.data[0])
 
         if unique_thetas is None:
             raise NotImplementedError("暂不支持非规则网格数据")
 
-        reshaped_data = self._reshape_to_grid(t_idx, p_idx, unique_thetas, unique_phis)
-
-        data_vars = {}
-        for i, col_name in enumerate(self.headers):
-            if i == t_idx or i == p_idx:
-                continue
-
-            data_vars[col_name] = (["Frequency", "Theta", "Phi"], reshaped_data[:, :, :, i])
-
-        return xr.Dataset(
-            data_vars=data_vars,
-            coords={
-                "Frequency": self.frequencies,
-                "Theta": unique_thetas,
-                "Phi": unique_phis
-            },
-            attrs={"description": "Parsed from FFE file"}
-        )
+        reshaped_data = self._reshape_to_grid(t_idx, p_idx, unique_thetas, unique_phis, phi_inner)
+        return self._build_dataset(reshaped_data, t_idx, p_idx, "Theta", "Phi", unique_thetas, unique_phis)
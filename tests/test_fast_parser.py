@@ -1,6 +1,8 @@
+import numpy as np
 import pytest
+import xarray as xr
 
-from ffe import parse, parse_ffe_array, parse_ffe_dataset, parse_ffe_datasets, parse_ffe_grid
+from ffe import FFData, FFEToXarray, parse, parse_ffe_array, parse_ffe_dataset, parse_ffe_datasets, parse_ffe_grid
 
 
 def write_sample_ffe(path, frequency, offset=0, theta_samples=2, phi_samples=2):
@@ -94,3 +96,384 @@ def test_parse_multiple_files_rejects_incompatible_grid(tmp_path):
 
     with pytest.raises(ValueError, match="coordinates|dimensions"):
         parse_ffe_datasets([first, second])
+
+
+def test_parse_grid_with_theta_inner_ordering(tmp_path):
+    ffe_file = tmp_path / "theta_inner.ffe"
+    ffe_file.write_text(
+        """#Configuration Name: sample
+#Frequency: 100
+#No. of Theta Samples: 2
+#No. of Phi Samples: 2
+# "Theta" "Phi" "Re(Etheta)" "Im(Etheta)" "Re(Ephi)" "Im(Ephi)"
+ 0 0 1 0 2 0
+ 90 0 5 0 6 0
+ 0 90 3 0 4 0
+ 90 90 7 0 8 0
+""",
+        encoding="utf-8",
+    )
+
+    headers, frequencies, data = parse_ffe_array(ffe_file)
+    assert data[0, 1].tolist() == [90.0, 0.0, 5.0, 0.0, 6.0, 0.0]
+
+    _, _, theta, phi, grid_data = parse_ffe_grid(ffe_file)
+    assert theta.tolist() == [0.0, 90.0]
+    assert phi.tolist() == [0.0, 90.0]
+    assert grid_data[0, 0, 1].tolist() == [0.0, 90.0, 3.0, 0.0, 4.0, 0.0]
+    assert grid_data[0, 1, 0].tolist() == [90.0, 0.0, 5.0, 0.0, 6.0, 0.0]
+
+    ds = FFEToXarray((headers, frequencies, data)).convert()
+    assert ds.Theta.values.tolist() == [0.0, 90.0]
+    assert ds.Phi.values.tolist() == [0.0, 90.0]
+    assert ds["Re(Etheta)"].sel(Frequency=100, Theta=90, Phi=0).item() == 5.0
+
+
+def test_electric_field_is_cached(tmp_path):
+    ffe_file = tmp_path / "sample.ffe"
+    write_sample_ffe(ffe_file, 100)
+
+    ffd = parse(ffe_file)
+    efield = ffd.electric_field
+    assert ffd.electric_field is efield
+    assert ffd.exyz is ffd.exyz
+
+    with pytest.raises(ValueError):
+        ffd.exyz[0, 0, 0, 0] = 0
+    with pytest.raises(ValueError):
+        ffd.to_cartesian()["Ex"].values[0, 0, 0] = 0
+    with pytest.raises(ValueError):
+        efield["Etheta"].values[0, 0, 0] = 0
+    assert efield["Ephi"].sel(Frequency=100, Theta=90, Phi=0).item() == 6 + 0j
+
+
+def test_parse_with_complex64_dtype(tmp_path):
+    ffe_file = tmp_path / "sample.ffe"
+    write_sample_ffe(ffe_file, 100)
+
+    ffd = parse(ffe_file, dtype=np.complex64)
+    assert ffd.electric_field["Etheta"].dtype == np.complex64
+    assert ffd.to_cartesian()["Ex"].dtype == np.complex64
+
+    with pytest.raises(TypeError):
+        parse(ffe_file, dtype=np.float32)
+
+
+def test_parse_cache_invalidated_when_file_changes(tmp_path):
+    ffe_file = tmp_path / "sample.ffe"
+    write_sample_ffe(ffe_file, 100)
+    assert parse_ffe_grid(ffe_file)[1].tolist() == [100.0]
+    assert parse_ffe_grid(ffe_file) is parse_ffe_grid(ffe_file)
+
+    write_sample_ffe(ffe_file, 250, offset=1000)
+    assert parse_ffe_grid(ffe_file)[1].tolist() == [250.0]
+
+
+def test_values_and_nbytes(tmp_path):
+    ffe_file = tmp_path / "sample.ffe"
+    write_sample_ffe(ffe_file, 100)
+
+    ffd = parse(ffe_file)
+    assert ffd.values.dims == ("variable", "Frequency", "Theta", "Phi")
+    assert ffd.to_numpy().shape == (4, 1, 2, 2)
+    assert ffd.nbytes == 4 * 1 * 2 * 2 * 8
+
+
+def test_parse_with_frequency_chunks(tmp_path):
+    pytest.importorskip("dask")
+    first = tmp_path / "first.ffe"
+    second = tmp_path / "second.ffe"
+    write_sample_ffe(first, 100)
+    write_sample_ffe(second, 200, offset=10)
+
+    ffd = parse([first, second], chunks=1)
+    assert ffd.ds["Re(Etheta)"].chunks == ((1, 1), (2,), (2,))
+    etheta = ffd.electric_field["Etheta"]
+    assert etheta.chunks is not None
+    assert etheta.sel(Frequency=200, Theta=0, Phi=90).compute().item() == 13 + 0j
+
+    cartesian = ffd.to_cartesian()
+    assert cartesian["Ex"].chunks is not None
+    assert ffd._cartesian is None
+    assert ffd.sel_fast(200, [0, 90], 90).tolist() == [13 + 0j, 17 + 0j]
+    eager = parse([first, second]).to_cartesian()
+    for name in ("Ex", "Ey", "Ez"):
+        assert np.allclose(cartesian[name].transpose(*eager[name].dims).values, eager[name].values)
+    assert np.allclose(ffd.exyz, parse([first, second]).exyz)
+    assert ffd._cartesian is None
+
+
+def test_parse_grid_disk_cache(tmp_path):
+    ffe_file = tmp_path / "sample.ffe"
+    cache_dir = tmp_path / "cache"
+    write_sample_ffe(ffe_file, 100)
+
+    expected = parse_ffe_grid(ffe_file)
+    cached = parse_ffe_grid(ffe_file, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.npz"))) == 1
+
+    reloaded = parse_ffe_grid(ffe_file, cache_dir=cache_dir)
+    assert reloaded[0] == expected[0]
+    for expected_array, cached_array in zip(expected[1:], reloaded[1:]):
+        assert np.array_equal(expected_array, cached_array)
+    assert cached[0] == expected[0]
+
+    ffd = parse(ffe_file, cache_dir=cache_dir)
+    assert ffd.ds["Re(Etheta)"].sel(Frequency=100, Theta=90, Phi=90).item() == 7.0
+
+
+def test_parse_large_multi_section_file(tmp_path):
+    thetas = np.arange(0, 181, 5.0)
+    phis = np.arange(0, 360, 5.0)
+    theta_grid, phi_grid = np.meshgrid(thetas, phis, indexing="ij")
+    n_freq = 12
+
+    sections = []
+    for f in range(n_freq):
+        values = np.column_stack(
+            [theta_grid.ravel(), phi_grid.ravel()] + [np.full(theta_grid.size, f + 0.25 * c) for c in range(4)]
+        )
+        body = "\n".join(" " + " ".join(f"{v:.8e}" for v in row) for row in values)
+        sections.append(
+            f"""#Configuration Name: sweep
+#Frequency: {1e6 * (f + 1)}
+#No. of Theta Samples: {len(thetas)}
+#No. of Phi Samples: {len(phis)}
+# "Theta" "Phi" "Re(Etheta)" "Im(Etheta)" "Re(Ephi)" "Im(Ephi)"
+{body}
+"""
+        )
+    ffe_file = tmp_path / "large.ffe"
+    ffe_file.write_text("".join(sections), encoding="utf-8")
+    assert ffe_file.stat().st_size > 1 << 20
+
+    _, frequencies, theta, phi, data = parse_ffe_grid(ffe_file)
+    assert frequencies.tolist() == [1e6 * (f + 1) for f in range(n_freq)]
+    assert np.array_equal(theta, thetas)
+    assert np.array_equal(phi, phis)
+    for f in range(n_freq):
+        assert np.all(data[f, :, :, 2] == f)
+        assert np.all(data[f, :, :, 5] == f + 0.75)
+
+
+def test_parse_multiple_files_drops_overlapping_frequencies(tmp_path):
+    first = tmp_path / "first.ffe"
+    second = tmp_path / "second.ffe"
+    write_sample_ffe(first, 100, offset=100)
+    write_sample_ffe(second, 100, offset=200)
+
+    ds = parse_ffe_datasets([first, second, first])
+    assert ds.Frequency.values.tolist() == [100.0]
+    assert ds["Re(Etheta)"].sel(Frequency=100, Theta=0, Phi=0).item() == 101.0
+
+
+def test_sel_fast_matches_xarray_sel(tmp_path):
+    first = tmp_path / "first.ffe"
+    second = tmp_path / "second.ffe"
+    write_sample_ffe(first, 100)
+    write_sample_ffe(second, 200, offset=10)
+    ffd = parse([first, second])
+
+    expected = ffd.electric_field.sel(Frequency=200, Theta=[90, 0], Phi=[0, 90])["Ephi"].values
+    assert np.array_equal(ffd.sel_fast(200, [90, 0], [0, 90], field="Ephi"), expected)
+    assert ffd.sel_fast([100, 200], 90, 90).tolist() == [7 + 0j, 17 + 0j]
+
+    with pytest.raises(KeyError):
+        ffd.sel_fast(100, 45, 0)
+
+
+def test_parse_reads_sample_counts_after_feko_banner(tmp_path):
+    ffe_file = tmp_path / "banner.ffe"
+    ffe_file.write_text(
+        """** File exported by FEKO kernel version 2022.0.1-1
+
+#Configuration Name: sample
+#Frequency: 100
+#No. of Theta Samples: 3
+#No. of Phi Samples: 2
+# "Theta" "Phi" "Re(Etheta)" "Im(Etheta)" "Re(Ephi)" "Im(Ephi)"
+ 0 0 1 0 2 0
+ 0 90 3 0 4 0
+ 90 0 5 0 6 0
+ 90 90 7 0 8 0
+""",
+        encoding="utf-8",
+    )
+
+    with pytest.raises(RuntimeError, match="sample counts"):
+        parse_ffe_grid(ffe_file)
+
+
+def test_parse_array_without_sample_counts(tmp_path):
+    ffe_file = tmp_path / "no_counts.ffe"
+    sections = []
+    for f in range(3):
+        rows = "".join(f" {t} {p} {f} 0 0 0\n" for t in (0, 90) for p in (0, 90))
+        sections.append(
+            f'#Configuration Name: sample\n#Frequency: {f + 1}\n# "Theta" "Phi" "Re(Etheta)" "Im(Etheta)" "Re(Ephi)" "Im(Ephi)"\n{rows}'
+        )
+    ffe_file.write_text("".join(sections), encoding="utf-8")
+
+    _, frequencies, data = parse_ffe_array(ffe_file)
+    assert frequencies.tolist() == [1.0, 2.0, 3.0]
+    assert data.shape == (3, 4, 6)
+    assert data[2, :, 2].tolist() == [2.0] * 4
+
+
+@pytest.mark.parametrize("corrupt_bytes", [b"", b"PK\x03\x04truncated"])
+def test_parse_grid_disk_cache_recovers_from_corrupt_file(tmp_path, corrupt_bytes):
+    ffe_file = tmp_path / "sample.ffe"
+    cache_dir = tmp_path / "cache"
+    write_sample_ffe(ffe_file, 100)
+
+    parse_ffe_grid(ffe_file, cache_dir=cache_dir)
+    (cache_file,) = cache_dir.glob("*.npz")
+    cache_file.write_bytes(corrupt_bytes)
+
+    _, frequencies, _, _, data = parse_ffe_grid(ffe_file, cache_dir=cache_dir)
+    assert frequencies.tolist() == [100.0]
+    assert data[0, 1, 1, 2] == 7.0
+    assert parse_ffe_grid(ffe_file, cache_dir=cache_dir)[4][0, 1, 1, 2] == 7.0
+    assert [path.name for path in cache_dir.iterdir()] == [cache_file.name]
+
+
+def test_convert_sorts_descending_coordinates():
+    rows = [(theta, phi, theta * 10 + phi) for theta in (90.0, 0.0) for phi in (0.0, 90.0)]
+    data = np.array(rows)[None]
+
+    ds = FFEToXarray(headers=["Theta", "Phi", "Value"], frequencies=[100.0], data=data).convert()
+    assert ds.Theta.values.tolist() == [0.0, 90.0]
+    assert ds.Phi.values.tolist() == [0.0, 90.0]
+    assert ds["Value"].sel(Frequency=100, Theta=90, Phi=0).item() == 900.0
+    assert ds["Value"].sel(Frequency=100, Theta=0, Phi=90).item() == 90.0
+
+
+@pytest.mark.parametrize("dims", [("Frequency", "Theta", "Phi"), ("Phi", "Frequency", "Theta")])
+def test_to_cartesian_matches_reference_formulas(dims):
+    rng = np.random.default_rng(0)
+    columns = ["Re(Etheta)", "Im(Etheta)", "Re(Ephi)", "Im(Ephi)"]
+    ds = xr.Dataset(
+        {name: (("Frequency", "Theta", "Phi"), rng.normal(size=(2, 5, 7))) for name in columns},
+        coords={
+            "Frequency": [100.0, 200.0],
+            "Theta": np.linspace(0, 180, 5),
+            "Phi": np.linspace(0, 360, 7),
+        },
+    ).transpose(*dims)
+
+    etheta = ds["Re(Etheta)"] + 1j * ds["Im(Etheta)"]
+    ephi = ds["Re(Ephi)"] + 1j * ds["Im(Ephi)"]
+    theta = np.deg2rad(ds.Theta)
+    phi = np.deg2rad(ds.Phi)
+    expected = {
+        "Ex": etheta * np.cos(theta) * np.cos(phi) - ephi * np.sin(phi),
+        "Ey": etheta * np.cos(theta) * np.sin(phi) + ephi * np.cos(phi),
+        "Ez": -etheta * np.sin(theta),
+    }
+
+    ffd = FFData(ds)
+    cartesian = ffd.to_cartesian()
+    for index, name in enumerate(("Ex", "Ey", "Ez")):
+        reference = expected[name].transpose(*cartesian[name].dims).values
+        np.testing.assert_allclose(cartesian[name].values, reference)
+        np.testing.assert_allclose(ffd.exyz[index], reference)
+
+
+def test_parse_multiple_files_keeps_repeats_within_one_file(tmp_path):
+    repeated = tmp_path / "repeated.ffe"
+    other = tmp_path / "other.ffe"
+    write_sample_ffe(tmp_path / "a.ffe", 100, offset=100)
+    write_sample_ffe(tmp_path / "b.ffe", 100, offset=200)
+    repeated.write_text((tmp_path / "a.ffe").read_text() + (tmp_path / "b.ffe").read_text(), encoding="utf-8")
+    write_sample_ffe(other, 100, offset=300)
+
+    assert parse_ffe_datasets([repeated]).Frequency.values.tolist() == [100.0, 100.0]
+    ds = parse_ffe_datasets([repeated, other])
+    assert ds.Frequency.values.tolist() == [100.0, 100.0]
+    assert ds["Re(Etheta)"].isel(Frequency=1).sel(Theta=0, Phi=0).item() == 201.0
+
+
+def make_random_field_dataset(shape=(2, 4, 4)):
+    rng = np.random.default_rng(0)
+    columns = ["Re(Etheta)", "Im(Etheta)", "Re(Ephi)", "Im(Ephi)"]
+    return xr.Dataset(
+        {name: (("Frequency", "Theta", "Phi"), rng.normal(size=shape)) for name in columns},
+        coords={
+            "Frequency": np.arange(1, shape[0] + 1) * 100.0,
+            "Theta": np.linspace(0, 180, shape[1]),
+            "Phi": np.linspace(0, 360, shape[2]),
+        },
+    )
+
+
+@pytest.mark.parametrize("shape", [(2, 4, 4), (2, 3, 5)])
+def test_electric_field_aligns_transposed_imaginary_part(shape):
+    ds = make_random_field_dataset(shape)
+    ds["Im(Etheta)"] = ds["Im(Etheta)"].transpose("Frequency", "Phi", "Theta")
+
+    etheta = FFData(ds).electric_field["Etheta"]
+    expected = (ds["Re(Etheta)"] + 1j * ds["Im(Etheta)"]).transpose(*etheta.dims)
+    np.testing.assert_allclose(etheta.values, expected.values)
+
+
+def test_to_cartesian_aligns_transposed_ephi():
+    ds = make_random_field_dataset((2, 3, 5))
+    for name in ("Re(Ephi)", "Im(Ephi)"):
+        ds[name] = ds[name].transpose("Phi", "Theta", "Frequency")
+
+    etheta = ds["Re(Etheta)"] + 1j * ds["Im(Etheta)"]
+    ephi = ds["Re(Ephi)"] + 1j * ds["Im(Ephi)"]
+    theta = np.deg2rad(ds.Theta)
+    phi = np.deg2rad(ds.Phi)
+    expected = {
+        "Ex": etheta * np.cos(theta) * np.cos(phi) - ephi * np.sin(phi),
+        "Ey": etheta * np.cos(theta) * np.sin(phi) + ephi * np.cos(phi),
+        "Ez": -etheta * np.sin(theta),
+    }
+
+    cartesian = FFData(ds).to_cartesian()
+    for name, reference in expected.items():
+        np.testing.assert_allclose(cartesian[name].values, reference.transpose(*cartesian[name].dims).values)
+
+
+def test_parse_grid_disk_cache_ignores_write_failures(tmp_path):
+    ffe_file = tmp_path / "sample.ffe"
+    cache_dir = tmp_path / "not_a_directory"
+    cache_dir.write_text("", encoding="utf-8")
+    write_sample_ffe(ffe_file, 100)
+
+    _, frequencies, _, _, data = parse_ffe_grid(ffe_file, cache_dir=cache_dir)
+    assert frequencies.tolist() == [100.0]
+    assert data[0, 1, 1, 2] == 7.0
+
+
+def test_parse_grid_disk_cache_key_includes_format_version(tmp_path, monkeypatch):
+    import ffe.parser
+
+    ffe_file = tmp_path / "sample.ffe"
+    cache_dir = tmp_path / "cache"
+    write_sample_ffe(ffe_file, 100)
+
+    parse_ffe_grid(ffe_file, cache_dir=cache_dir)
+    monkeypatch.setattr(ffe.parser, "_GRID_CACHE_VERSION", ffe.parser._GRID_CACHE_VERSION + 1)
+    parse_ffe_grid(ffe_file, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.npz"))) == 2
+
+
+def test_parse_strips_single_quotes_from_headers(tmp_path):
+    ffe_file = tmp_path / "quoted.ffe"
+    ffe_file.write_text(
+        """#Configuration Name: sample
+#Frequency: 100
+#No. of Theta Samples: 1
+#No. of Phi Samples: 2
+# "Theta" "Phi" "Re(E'theta)" "Im(E'theta)"
+ 0 0 1 0
+ 0 90 3 0
+""",
+        encoding="utf-8",
+    )
+
+    headers, _, _ = parse_ffe_array(ffe_file)
+    assert headers == ("Theta", "Phi", "Re(Etheta)", "Im(Etheta)")
+    assert list(parse_ffe_dataset(ffe_file).data_vars) == ["Re(Etheta)", "Im(Etheta)"]